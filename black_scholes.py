@@ -1,15 +1,32 @@
 import numpy as np
-from scipy.stats import norm
+from scipy.special import ndtr
 import logging
-from dataclasses import dataclass
-from typing import Tuple, Literal
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
+from logging_utils import setup_logging, init_worker_logging
+from dataclasses import dataclass, field
+from typing import Optional, Tuple, Literal, List, Sequence, Union
 from math import log, sqrt, exp
 
+# Fused chain kernel: compiled Cython extension, then Numba, else the NumPy batch path
+try:
+    from bs_kernel import price_chain as _chain_kernel
+except ImportError:
+    try:
+        from black_scholes_numba import price_chain as _chain_kernel
+    except ImportError:
+        _chain_kernel = None
+
+_INV_SQRT_2PI = 0.3989422804014327  # 1/sqrt(2π), standard normal PDF scale
+
+# Action codes used by the array-based chain analysis
+HOLD, BUY, SELL = 0, 1, -1
+_ACTION_NAMES = {HOLD: "HOLD", BUY: "BUY", SELL: "SELL"}
+
 # Set up logging
-logging.basicConfig(filename='options_trading.log', level=logging.INFO,
-                   format='%(asctime)s %(levelname)s %(message)s')
+setup_logging('options_trading.log')
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class OptionData:
     """Data structure for option parameters"""
     stock_price: float      # Current stock price (S₀)
@@ -19,77 +36,167 @@ class OptionData:
     volatility: float      # Stock price volatility (σ)
     option_type: Literal['call', 'put']
 
+    # Derived terms, computed once per contract
+    _sqrt_t: float = field(init=False, repr=False, compare=False)    # sqrt(T)
+    _disc: float = field(init=False, repr=False, compare=False)      # exp(-rT)
+    _sigma2_t: float = field(init=False, repr=False, compare=False)  # σ²T
+
+    def __post_init__(self):
+        # Frozen dataclass: derived slots have to be set through object.__setattr__
+        object.__setattr__(self, '_sqrt_t', sqrt(self.time_to_expiry))
+        object.__setattr__(self, '_disc', exp(-self.risk_free_rate * self.time_to_expiry))
+        object.__setattr__(self, '_sigma2_t', self.volatility * self.volatility * self.time_to_expiry)
+
 class BlackScholes:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
 
-    def calculate_d1_d2(self, data: OptionData) -> Tuple[float, float]:
-        """Calculate d1 and d2 parameters for Black-Scholes formula"""
-        try:
-            d1 = (log(data.stock_price / data.strike_price) + 
-                  (data.risk_free_rate + 0.5 * data.volatility ** 2) * data.time_to_expiry) / \
-                 (data.volatility * sqrt(data.time_to_expiry))
-            
-            d2 = d1 - data.volatility * sqrt(data.time_to_expiry)
-            return d1, d2
-        except Exception as e:
-            self.logger.error(f"Error calculating d1 and d2: {str(e)}")
-            raise
+    def calculate_d1_d2(self, data: OptionData) -> Tuple[float, float, float]:
+        """
+        Calculate d1 and d2 parameters for Black-Scholes formula
+        Returns: (d1, d2, sqrt_t) so callers can reuse sqrt(T)
+        """
+        sqrt_t = data._sqrt_t
+        d1 = (log(data.stock_price / data.strike_price) + 
+              data.risk_free_rate * data.time_to_expiry + 0.5 * data._sigma2_t) / \
+             (data.volatility * sqrt_t)
+        
+        d2 = d1 - data.volatility * sqrt_t
+        return d1, d2, sqrt_t
+
+    def _d1_d2_batch(self, S, K, T, r, sigma):
+        """Vectorized d1, d2 and sqrt(T) over arrays of contracts"""
+        sqrt_t = np.sqrt(T)
+        d1 = (np.log(S / K) + (r + 0.5 * sigma * sigma) * T) / (sigma * sqrt_t)
+        d2 = d1 - sigma * sqrt_t
+        return d1, d2, sqrt_t
+
+    def price_batch(self, S, K, T, r, sigma, is_call) -> np.ndarray:
+        """
+        Calculate theoretical prices for a whole chain of contracts at once
+        S, K, T, r, sigma: array-likes (or scalars) broadcast against each other
+        is_call: boolean array, True for calls and False for puts
+        """
+        S, K, T, r, sigma = (np.asarray(x, dtype=np.float64) for x in (S, K, T, r, sigma))
+        d1, d2, sqrt_t = self._d1_d2_batch(S, K, T, r, sigma)
+        disc = np.exp(-r * T)
+
+        call = S * ndtr(d1) - K * disc * ndtr(d2)
+        put = K * disc * ndtr(-d2) - S * ndtr(-d1)
+        return np.where(is_call, call, put)
+
+    def greeks_batch(self, S, K, T, r, sigma, is_call) -> dict:
+        """
+        Calculate Greeks for a whole chain of contracts at once
+        Returns a dict of arrays keyed by 'delta', 'gamma', 'theta', 'vega'
+        """
+        S, K, T, r, sigma = (np.asarray(x, dtype=np.float64) for x in (S, K, T, r, sigma))
+        d1, d2, sqrt_t = self._d1_d2_batch(S, K, T, r, sigma)
+        disc = np.exp(-r * T)
+        pdf_d1 = np.exp(-0.5 * d1 * d1) * _INV_SQRT_2PI
+        cdf_d1 = ndtr(d1)
+
+        # Delta
+        delta = np.where(is_call, cdf_d1, cdf_d1 - 1)
+
+        # Gamma (same for calls and puts)
+        gamma = pdf_d1 / (S * sigma * sqrt_t)
+
+        # Theta
+        theta_component = -(S * pdf_d1 * sigma) / (2 * sqrt_t)
+        theta = np.where(is_call,
+                         theta_component - r * K * disc * ndtr(d2),
+                         theta_component + r * K * disc * ndtr(-d2))
+
+        # Vega (same for calls and puts)
+        vega = S * sqrt_t * pdf_d1
+
+        return {
+            'delta': delta,
+            'gamma': gamma,
+            'theta': theta,
+            'vega': vega
+        }
+
+    def price_chain(self, S, K, T, r, sigma, is_call) -> Tuple[np.ndarray, dict]:
+        """
+        Calculate prices and Greeks for a whole chain in a single pass
+        Uses the compiled Cython or Numba kernel when available, otherwise the NumPy batch path
+        Returns: (prices, greeks)
+        """
+        if _chain_kernel is None:
+            return (self.price_batch(S, K, T, r, sigma, is_call),
+                    self.greeks_batch(S, K, T, r, sigma, is_call))
+
+        S, K, T, r, sigma, is_call = np.broadcast_arrays(
+            *np.atleast_1d(S, K, T, r, sigma, is_call))
+        S, K, T, r, sigma = (np.ascontiguousarray(x, dtype=np.float64)
+                             for x in (S, K, T, r, sigma))
+        is_call = np.ascontiguousarray(is_call, dtype=np.bool_).view(np.uint8)
+
+        prices = np.empty_like(K)
+        greeks = {name: np.empty_like(K) for name in ('delta', 'gamma', 'vega', 'theta')}
+        _chain_kernel(S, K, T, r, sigma, is_call, prices,
+                      greeks['delta'], greeks['gamma'], greeks['vega'], greeks['theta'])
+        return prices, greeks
+
+    @staticmethod
+    def _as_batch(contracts: Sequence[OptionData]) -> tuple:
+        """Convert a sequence of OptionData into batch arguments"""
+        return (np.array([c.stock_price for c in contracts], dtype=np.float64),
+                np.array([c.strike_price for c in contracts], dtype=np.float64),
+                np.array([c.time_to_expiry for c in contracts], dtype=np.float64),
+                np.array([c.risk_free_rate for c in contracts], dtype=np.float64),
+                np.array([c.volatility for c in contracts], dtype=np.float64),
+                np.array([c.option_type == 'call' for c in contracts], dtype=np.bool_))
 
     def calculate_option_price(self, data: OptionData) -> float:
         """Calculate theoretical option price using Black-Scholes model"""
-        try:
-            d1, d2 = self.calculate_d1_d2(data)
-            
-            if data.option_type == 'call':
-                option_price = (data.stock_price * norm.cdf(d1) - 
-                              data.strike_price * exp(-data.risk_free_rate * data.time_to_expiry) * 
-                              norm.cdf(d2))
-            else:  # put option
-                option_price = (data.strike_price * exp(-data.risk_free_rate * data.time_to_expiry) * 
-                              norm.cdf(-d2) - data.stock_price * norm.cdf(-d1))
-            
-            return option_price
-        except Exception as e:
-            self.logger.error(f"Error calculating option price: {str(e)}")
-            raise
+        d1, d2, _ = self.calculate_d1_d2(data)
+        disc = data._disc
+        
+        if data.option_type == 'call':
+            option_price = (data.stock_price * ndtr(d1) - 
+                          data.strike_price * disc * ndtr(d2))
+        else:  # put option
+            option_price = (data.strike_price * disc * ndtr(-d2) - 
+                          data.stock_price * ndtr(-d1))
+        
+        return float(option_price)
 
     def calculate_greeks(self, data: OptionData) -> dict:
         """Calculate option Greeks for risk management"""
-        try:
-            d1, d2 = self.calculate_d1_d2(data)
-            
-            # Delta
-            if data.option_type == 'call':
-                delta = norm.cdf(d1)
-            else:
-                delta = norm.cdf(d1) - 1
+        d1, d2, sqrt_t = self.calculate_d1_d2(data)
+        disc = data._disc
+        pdf_d1 = exp(-0.5 * d1 * d1) * _INV_SQRT_2PI
+        
+        # Delta
+        if data.option_type == 'call':
+            delta = ndtr(d1)
+        else:
+            delta = ndtr(d1) - 1
 
-            # Gamma (same for calls and puts)
-            gamma = norm.pdf(d1) / (data.stock_price * data.volatility * sqrt(data.time_to_expiry))
+        # Gamma (same for calls and puts)
+        gamma = pdf_d1 / (data.stock_price * data.volatility * sqrt_t)
 
-            # Theta
-            theta_component = -(data.stock_price * norm.pdf(d1) * data.volatility) / \
-                            (2 * sqrt(data.time_to_expiry))
-            if data.option_type == 'call':
-                theta = theta_component - data.risk_free_rate * data.strike_price * \
-                       exp(-data.risk_free_rate * data.time_to_expiry) * norm.cdf(d2)
-            else:
-                theta = theta_component + data.risk_free_rate * data.strike_price * \
-                       exp(-data.risk_free_rate * data.time_to_expiry) * norm.cdf(-d2)
-
-            # Vega (same for calls and puts)
-            vega = data.stock_price * sqrt(data.time_to_expiry) * norm.pdf(d1)
-
-            return {
-                'delta': delta,
-                'gamma': gamma,
-                'theta': theta,
-                'vega': vega
-            }
-        except Exception as e:
-            self.logger.error(f"Error calculating Greeks: {str(e)}")
-            raise
+        # Theta
+        theta_component = -(data.stock_price * pdf_d1 * data.volatility) / (2 * sqrt_t)
+        if data.option_type == 'call':
+            theta = theta_component - data.risk_free_rate * data.strike_price * \
+                   disc * ndtr(d2)
+        else:
+            theta = theta_component + data.risk_free_rate * data.strike_price * \
+                   disc * ndtr(-d2)
+
+        # Vega (same for calls and puts)
+        vega = data.stock_price * sqrt_t * pdf_d1
+
+        return {
+            'delta': float(delta),
+            'gamma': gamma,
+            'theta': float(theta),
+            'vega': vega
+        }
 
 class OptionsTrader:
     def __init__(self, threshold_percent: float = 0.05):
@@ -101,45 +208,163 @@ class OptionsTrader:
         self.threshold_percent = threshold_percent
         self.logger = logging.getLogger(__name__)
 
+    def _decide(self, market_price: float, theoretical_price: float) -> Tuple[bool, str, float]:
+        """
+        Trading decision for one contract given its market and theoretical price
+        A non-positive theoretical price has no relative difference: any higher market price is a SELL
+        """
+        if theoretical_price <= 0:
+            if market_price > theoretical_price:
+                return True, "SELL", market_price - theoretical_price
+            return False, "HOLD", 0.0
+
+        price_diff_percent = (market_price - theoretical_price) / theoretical_price
+        if abs(price_diff_percent) > self.threshold_percent:
+            if market_price < theoretical_price:
+                return True, "BUY", theoretical_price - market_price
+            else:
+                return True, "SELL", market_price - theoretical_price
+
+        return False, "HOLD", 0.0
+
     def analyze_opportunity(self, 
-                          market_price: float, 
-                          option_data: OptionData) -> Tuple[bool, str, float]:
+                          market_price: Union[float, Sequence[float]], 
+                          option_data: Union[OptionData, Sequence[OptionData]]
+                          ) -> Union[Tuple[bool, str, float], List[Tuple[bool, str, float]]]:
         """
         Analyze if there's a trading opportunity based on market price vs theoretical price
-        Returns: (should_trade, action, expected_profit)
+        Accepts a single contract, or a list of contracts with matching market prices,
+        in which case the whole chain is priced in one batch
+        Returns: (should_trade, action, expected_profit), or a list of them for a chain
         """
         try:
+            if not isinstance(option_data, OptionData):
+                return self._analyze_contracts(market_price, option_data)
+
             # Calculate theoretical price
             theoretical_price = self.bs_model.calculate_option_price(option_data)
-            
-            # Calculate price difference percentage
-            price_diff_percent = (market_price - theoretical_price) / theoretical_price
-            
-            # Get Greeks for risk assessment
-            greeks = self.bs_model.calculate_greeks(option_data)
-            
-            # Log analysis
-            self.logger.info(f"Analysis - Market Price: {market_price:.2f}, "
-                           f"Theoretical Price: {theoretical_price:.2f}, "
-                           f"Difference: {price_diff_percent:.2%}")
-            self.logger.info(f"Greeks - Delta: {greeks['delta']:.4f}, "
-                           f"Gamma: {greeks['gamma']:.4f}, "
-                           f"Theta: {greeks['theta']:.4f}, "
-                           f"Vega: {greeks['vega']:.4f}")
 
             # Decision logic
-            if abs(price_diff_percent) > self.threshold_percent:
-                if market_price < theoretical_price:
-                    return True, "BUY", theoretical_price - market_price
-                else:
-                    return True, "SELL", market_price - theoretical_price
-            
-            return False, "HOLD", 0.0
+            decision = self._decide(market_price, theoretical_price)
+
+            # Log analysis; Greeks are only needed for risk assessment of an actual trade
+            if self.logger.isEnabledFor(logging.INFO):
+                price_diff_percent = ((market_price - theoretical_price) / theoretical_price
+                                      if theoretical_price > 0 else float('inf'))
+                self.logger.info("Analysis - Market Price: %.2f, Theoretical Price: %.2f, "
+                               "Difference: %.2f%%",
+                               market_price, theoretical_price, price_diff_percent * 100)
+            if decision[0]:
+                greeks = self.bs_model.calculate_greeks(option_data)
+                self.logger.info("Greeks - Delta: %.4f, Gamma: %.4f, Theta: %.4f, Vega: %.4f",
+                               greeks['delta'], greeks['gamma'], greeks['theta'], greeks['vega'])
+
+            return decision
+
+        except Exception as e:
+            self.logger.error("Error analyzing opportunity: %s", e)
+            raise
+
+    def _decide_chain(self,
+                      market_prices: np.ndarray,
+                      theoretical_prices: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Vectorized trading decisions for a chain of market vs theoretical prices
+        Non-positive theoretical prices follow the same rule as _decide
+        """
+        positive = theoretical_prices > 0
+        price_diff_percent = np.divide(market_prices - theoretical_prices, theoretical_prices,
+                                       out=np.zeros_like(theoretical_prices), where=positive)
+        should_trade = np.where(positive,
+                                np.abs(price_diff_percent) > self.threshold_percent,
+                                market_prices > theoretical_prices)
+        action = np.where(should_trade,
+                          np.where(market_prices < theoretical_prices, BUY, SELL),
+                          HOLD).astype(np.int8)
+        expected_profit = np.abs(market_prices - theoretical_prices) * should_trade
+        return should_trade, action, expected_profit
+
+    def _log_chain(self, action: np.ndarray, expected_profit: np.ndarray) -> None:
+        """Single summary log line for a whole chain"""
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info("Chain analysis - Contracts: %d, BUY: %d, SELL: %d, Expected Profit: %.2f",
+                             action.size, np.count_nonzero(action == BUY),
+                             np.count_nonzero(action == SELL), expected_profit.sum())
+
+    def analyze_chain(self,
+                      market_prices: np.ndarray,
+                      S, K, T, r, sigma, is_call) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Analyze a whole options chain given as arrays (one element per contract)
+        Returns: (should_trade, action, expected_profit) arrays, action holding BUY/SELL/HOLD codes
+        """
+        try:
+            market_prices = np.asarray(market_prices, dtype=np.float64)
+            theoretical_prices = self.bs_model.price_batch(S, K, T, r, sigma, is_call)
+
+            should_trade, action, expected_profit = self._decide_chain(market_prices, theoretical_prices)
+            self._log_chain(action, expected_profit)
+            return should_trade, action, expected_profit
+
+        except Exception as e:
+            self.logger.error("Error analyzing option chain: %s", e)
+            raise
+
+    def analyze_chains_parallel(self,
+                                chains: Sequence[tuple],
+                                executor: Optional[Executor] = None,
+                                max_workers: Optional[int] = None
+                                ) -> List[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Analyze several option chains in parallel worker processes
+        chains: each item is the (market_prices, S, K, T, r, sigma, is_call) arguments of analyze_chain
+        executor: long-lived pool to reuse across calls (create it with
+                  initializer=init_worker_logging); a temporary one is used if omitted
+        max_workers: size of the temporary pool, defaults to os.cpu_count()
+        Returns: analyze_chain results in the same order as chains
+        """
+        try:
+            results: List[Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]] = [None] * len(chains)
+            pool = executor or ProcessPoolExecutor(max_workers=max_workers or os.cpu_count(),
+                                                   initializer=init_worker_logging)
+            try:
+                futures = {pool.submit(_analyze_chain_job, self.threshold_percent, chain): i
+                           for i, chain in enumerate(chains)}
+                for future in as_completed(futures):
+                    results[futures[future]] = future.result()
+            finally:
+                if executor is None:
+                    pool.shutdown()
+            return results
 
         except Exception as e:
-            self.logger.error(f"Error analyzing opportunity: {str(e)}")
+            self.logger.error("Error analyzing option chains in parallel: %s", e)
             raise
 
+    def _analyze_contracts(self,
+                           market_prices: Sequence[float],
+                           contracts: Sequence[OptionData]) -> List[Tuple[bool, str, float]]:
+        """Analyze a list of contracts using the batch chain pricer"""
+        if len(market_prices) != len(contracts):
+            raise ValueError(f"Got {len(market_prices)} market prices for {len(contracts)} contracts")
+
+        theoretical_prices, greeks = self.bs_model.price_chain(*BlackScholes._as_batch(contracts))
+        should_trade, action, expected_profit = self._decide_chain(
+            np.asarray(market_prices, dtype=np.float64), theoretical_prices)
+
+        self._log_chain(action, expected_profit)
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info("Chain Greeks - Delta: %.4f, Gamma: %.4f, Theta: %.4f, Vega: %.4f",
+                             greeks['delta'].sum(), greeks['gamma'].sum(),
+                             greeks['theta'].sum(), greeks['vega'].sum())
+
+        return [(bool(trade), _ACTION_NAMES[int(code)], float(profit))
+                for trade, code, profit in zip(should_trade, action, expected_profit)]
+
+def _analyze_chain_job(threshold_percent: float, chain: tuple) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Worker-process entry point for OptionsTrader.analyze_chains_parallel"""
+    return OptionsTrader(threshold_percent=threshold_percent).analyze_chain(*chain)
+
 def main():
     # Example usage
     trader = OptionsTrader(threshold_percent=0.05)
@@ -163,13 +388,13 @@ def main():
         )
         
         if should_trade:
-            logging.info(f"Trading opportunity found! Action: {action}, "
-                        f"Expected Profit: ${expected_profit:.2f}")
+            logging.info("Trading opportunity found! Action: %s, Expected Profit: $%.2f",
+                         action, expected_profit)
         else:
             logging.info("No trading opportunity found")
             
     except Exception as e:
-        logging.error(f"Error in main: {str(e)}")
+        logging.error("Error in main: %s", e)
 
 if __name__ == "__main__":
     main()
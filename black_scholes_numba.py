@@ -0,0 +1,47 @@
+"""
+Numba-compiled Black-Scholes kernel for pricing a whole options chain in one pass.
+
+Tested with numba 0.68.0 / llvmlite 0.50.0. The normal CDF is built on math.erf
+so the kernel never calls back into SciPy.
+"""
+import math
+from numba import njit, prange
+
+_INV_SQRT2 = 0.70710678118654752
+_INV_SQRT_2PI = 0.3989422804014327
+
+@njit(cache=True, fastmath=True)
+def norm_cdf(x):
+    """Standard normal CDF"""
+    return 0.5 * (1.0 + math.erf(x * _INV_SQRT2))
+
+@njit(parallel=True, fastmath=True, cache=True)
+def price_chain(S, K, T, r, sigma, is_call,
+                out_price, out_delta, out_gamma, out_vega, out_theta):
+    """
+    Fused d1/d2/price/Greeks over every contract in the chain.
+    All inputs are 1-D arrays of equal length; results are written into the out_* arrays.
+    """
+    for i in prange(len(K)):
+        sqrt_t = math.sqrt(T[i])
+        sig_sqrt_t = sigma[i] * sqrt_t
+        d1 = (math.log(S[i] / K[i]) + (r[i] + 0.5 * sigma[i] * sigma[i]) * T[i]) / sig_sqrt_t
+        d2 = d1 - sig_sqrt_t
+        disc = math.exp(-r[i] * T[i])
+        pdf_d1 = math.exp(-0.5 * d1 * d1) * _INV_SQRT_2PI
+        cdf_d1 = norm_cdf(d1)
+        theta_component = -(S[i] * pdf_d1 * sigma[i]) / (2.0 * sqrt_t)
+
+        if is_call[i]:
+            cdf_d2 = norm_cdf(d2)
+            out_price[i] = S[i] * cdf_d1 - K[i] * disc * cdf_d2
+            out_delta[i] = cdf_d1
+            out_theta[i] = theta_component - r[i] * K[i] * disc * cdf_d2
+        else:
+            cdf_neg_d2 = norm_cdf(-d2)
+            out_price[i] = K[i] * disc * cdf_neg_d2 - S[i] * norm_cdf(-d1)
+            out_delta[i] = cdf_d1 - 1.0
+            out_theta[i] = theta_component + r[i] * K[i] * disc * cdf_neg_d2
+
+        out_gamma[i] = pdf_d1 / (S[i] * sig_sqrt_t)
+        out_vega[i] = S[i] * sqrt_t * pdf_d1
@@ -1,9 +1,13 @@
-import time
+import asyncio
 import logging
+import threading
 from typing import Tuple
 import os
 from dotenv import load_dotenv
 
+from logging_utils import setup_logging
+
+from alpaca.data.live import CryptoDataStream
 from alpaca.trading.client import TradingClient
 from alpaca.trading.stream import TradingStream
 from alpaca.trading.requests import MarketOrderRequest
@@ -16,17 +20,22 @@ api_key = os.getenv('ALPACA_API_KEY')
 secret_key = os.getenv('ALPACA_SECRET_KEY')
 paper = True
 
-trading_stream_client = TradingStream(api_key=api_key, secret_key=secret_key, paper=paper)
-
 async def trade_updates_handler(data):
     print(data)
 
-trading_stream_client.subscribe_trade_updates(trade_updates_handler)
-trading_stream_client.run()
+def start_trade_stream() -> TradingStream:
+    """
+    Subscribe to trade updates and run the stream on a background daemon thread
+    Returns: the running TradingStream client
+    """
+    trading_stream_client = TradingStream(api_key=api_key, secret_key=secret_key, paper=paper)
+    trading_stream_client.subscribe_trade_updates(trade_updates_handler)
+
+    threading.Thread(target=trading_stream_client.run, name="trade-stream", daemon=True).start()
+    return trading_stream_client
 
 # Set up logging
-logging.basicConfig(filename='trading_bot.log', level=logging.INFO,
-                    format='%(asctime)s %(levelname)s %(message)s')
+setup_logging('trading_bot.log')
 
 class ExchangeAPI:
     def __init__(self):
@@ -65,29 +74,50 @@ def detect_arbitrage(price_a: float, price_b: float, threshold: float = 0.5) ->
         return True, (price_b - price_a)
     return False, 0.0
 
-def main():
+def check_arbitrage(price_a: float, price_b: float, amount: float) -> None:
+    """Check the latest prices for arbitrage and act on it"""
+    # Check for arbitrage (e.g., buy on A, sell on B)
+    arb_found, profit_per_unit = detect_arbitrage(price_a, price_b, threshold=0.5)
+    if arb_found:
+        logging.info("Arbitrage found! Buy at %s, Sell at %s, Profit: %s per unit.",
+                     price_a, price_b, profit_per_unit * amount)
+        # Execute trades via API calls
+    else:
+        logging.info("No arbitrage opportunity found.")
+
+async def main():
     # Config
     symbol = ""
     amount = 0 
 
     # Initialize your exchange APIs with keys
 
-    # Main loop
-    while True:
-        # Fetch prices
-        price_a = 0
-        price_b = 0
+    # Stream trade updates in the background so the main loop keeps running
+    start_trade_stream()
+
+    # Latest known price on each exchange
+    prices = {'a': 0.0, 'b': 0.0}
+
+    async def on_quote(quote):
+        # Exchange A is quoted by Alpaca (we buy at its ask); exchange B's feed is still a TODO
+        if quote.ask_price == prices['a']:
+            return
+        prices['a'] = quote.ask_price
+        check_arbitrage(prices['a'], prices['b'], amount)
+
+    # Arbitrage checks are driven by quote updates instead of polling. The stream runs on a
+    # daemon thread like the trade stream, so Ctrl-C is never held up waiting on its socket
+    quote_stream = CryptoDataStream(api_key=api_key, secret_key=secret_key)
+    quote_stream.subscribe_quotes(on_quote, symbol)
+    quote_thread = threading.Thread(target=quote_stream.run, name="quote-stream", daemon=True)
+    quote_thread.start()
 
-        # Check for arbitrage (e.g., buy on A, sell on B)
-        arb_found, profit_per_unit = detect_arbitrage(price_a, price_b, threshold=0.5)
-        if arb_found:
-            logging.info(f"Arbitrage found! Buy at {price_a}, Sell at {price_b}, Profit: {profit_per_unit * amount} per unit.")
-            # Execute trades via API calls
-        else:
-            logging.info("No arbitrage opportunity found.")
+    # Periodic heartbeat only
+    while quote_thread.is_alive():
+        logging.info("Heartbeat - Price A: %s, Price B: %s", prices['a'], prices['b'])
+        await asyncio.sleep(5)
 
-        # Sleep before next iteration
-        time.sleep(5)
+    logging.error("Quote stream stopped")
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
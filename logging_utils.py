@@ -0,0 +1,45 @@
+import atexit
+import logging
+import logging.handlers
+import queue
+
+# Listener started by setup_logging, kept so pool workers can reach its file handlers
+_listener = None
+
+def setup_logging(filename: str, level: int = logging.INFO) -> None:
+    """
+    Configure the root logger to write to filename from a background thread
+    Callers only enqueue records; a QueueListener does the file I/O
+    Like logging.basicConfig, does nothing if the root logger already has handlers
+    """
+    global _listener
+    root = logging.getLogger()
+    if root.handlers:
+        return
+
+    file_handler = logging.FileHandler(filename)
+    file_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(message)s'))
+
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, file_handler)
+    listener.start()
+    atexit.register(listener.stop)
+    _listener = listener
+
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(level)
+
+def init_worker_logging() -> None:
+    """
+    Process pool initializer: log straight to the file handlers in worker processes
+    A forked worker inherits the QueueHandler but not the listener thread draining it
+    """
+    if _listener is None:
+        return
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, logging.handlers.QueueHandler):
+            root.removeHandler(handler)
+    for handler in _listener.handlers:
+        root.addHandler(handler)
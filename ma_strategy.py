@@ -1,14 +1,19 @@
 from price_data import PriceDataManager
 from exchange import ExchangeAPI
+from logging_utils import setup_logging, init_worker_logging
 import logging
-from typing import Optional
+import os
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
+from typing import Deque, Dict, List, Optional
 from dataclasses import dataclass
 from datetime import datetime
 import time
 
 # Set up logging
-logging.basicConfig(filename='trading.log', level=logging.INFO,
-                   format='%(asctime)s %(levelname)s %(message)s')
+setup_logging('trading.log')
+
+_WEEK_SECONDS = 7 * 24 * 60 * 60
 
 @dataclass
 class Position:
@@ -48,14 +53,49 @@ class MAStrategy:
         self.current_position: Optional[Position] = None
         self.logger = logging.getLogger(__name__)
 
+        # Cached MA window, re-read from the database only when a new weekly bar has landed
+        # or the oldest bar has aged out of the ma_weeks lookback
+        self._ma_window: Deque[float] = deque(maxlen=ma_weeks)
+        self._ma_sum = 0.0
+        self._first_bar_ts: Optional[int] = None  # Epoch seconds of the oldest bar in the window
+        self._last_bar_ts: Optional[int] = None   # Epoch seconds of the newest bar in the window
+
+    def _seed_ma(self) -> None:
+        """Load the last ma_weeks weekly prices from the database into the window"""
+        timestamps, prices = self.price_manager.get_recent_bars_array(self.symbol, self.ma_weeks)
+        if len(prices) < self.ma_weeks:
+            self._last_bar_ts = None  # Stay unseeded so the next tick raises too
+            raise ValueError(f"Insufficient historical data. Need {self.ma_weeks} weeks, have {len(prices)}")
+
+        self._ma_window.clear()
+        self._ma_window.extend(prices.tolist())
+        self._ma_sum = float(prices.sum())
+        self._first_bar_ts = int(timestamps[0])
+        self._last_bar_ts = int(timestamps[-1])
+
+    def current_ma(self) -> float:
+        """
+        Current moving average
+        Until the next weekly bar is due only the cached window is used; once it is due,
+        a single index lookup per tick checks whether it has been written yet
+        Re-seeds (and so raises on insufficient data) once the oldest bar leaves the lookback
+        """
+        now = time.time()
+        if self._last_bar_ts is None or self._first_bar_ts < now - self.ma_weeks * _WEEK_SECONDS:
+            self._seed_ma()
+        elif now >= self._last_bar_ts + _WEEK_SECONDS:
+            if self.price_manager.get_latest_timestamp(self.symbol) != self._last_bar_ts:
+                self._seed_ma()
+        return self._ma_sum / len(self._ma_window)
+
     def check_buy_signal(self, current_price: float, ma: float) -> bool:
         """Check if current price triggers a buy signal"""
         buy_price = ma * self.buy_threshold
         should_buy = current_price < buy_price
         
         if should_buy:
-            self.logger.info(f"Buy signal: Price {current_price:.2f} < {buy_price:.2f} "
-                           f"({self.buy_threshold:.2%} of MA {ma:.2f})")
+            self.logger.info("Buy signal: Price %.2f < %.2f (%.2f%% of MA %.2f)",
+                           current_price, buy_price, self.buy_threshold * 100, ma)
         
         return should_buy
 
@@ -65,8 +105,8 @@ class MAStrategy:
         should_sell = current_price > sell_price
         
         if should_sell:
-            self.logger.info(f"Sell signal: Price {current_price:.2f} > {sell_price:.2f} "
-                           f"({self.sell_threshold:.2%} of MA {ma:.2f})")
+            self.logger.info("Sell signal: Price %.2f > %.2f (%.2f%% of MA %.2f)",
+                           current_price, sell_price, self.sell_threshold * 100, ma)
         
         return should_sell
 
@@ -80,9 +120,9 @@ class MAStrategy:
                 quantity=self.position_size,
                 entry_time=datetime.now()
             )
-            self.logger.info(f"Executed BUY: {self.position_size} {self.symbol} at {price:.2f}")
+            self.logger.info("Executed BUY: %s %s at %.2f", self.position_size, self.symbol, price)
         except Exception as e:
-            self.logger.error(f"Buy execution error: {str(e)}")
+            self.logger.error("Buy execution error: %s", e)
             raise
 
     def execute_sell(self, price: float) -> None:
@@ -96,25 +136,25 @@ class MAStrategy:
                 roi = (price / self.current_position.entry_price - 1) * 100
                 
                 self.logger.info(
-                    f"Executed SELL: {self.position_size} {self.symbol} at {price:.2f}\n"
-                    f"Hold Time: {hold_time}\n"
-                    f"Profit: ${profit:.2f}\n"
-                    f"ROI: {roi:.2f}%"
+                    "Executed SELL: %s %s at %.2f\n"
+                    "Hold Time: %s\n"
+                    "Profit: $%.2f\n"
+                    "ROI: %.2f%%",
+                    self.position_size, self.symbol, price, hold_time, profit, roi
                 )
             
             self.current_position = None
             
         except Exception as e:
-            self.logger.error(f"Sell execution error: {str(e)}")
+            self.logger.error("Sell execution error: %s", e)
             raise
 
     def check_and_trade(self) -> None:
         """Check signals and execute trades if needed"""
         try:
             # Get current MA and price
-            ma, current_price = self.price_manager.calculate_weekly_ma(
-                self.symbol, self.ma_weeks
-            )
+            ma = self.current_ma()
+            current_price = self.price_manager.get_real_time_price(self.symbol)
             
             # Check signals and execute trades
             if not self.current_position and self.check_buy_signal(current_price, ma):
@@ -124,12 +164,70 @@ class MAStrategy:
                 self.execute_sell(current_price)
                 
             else:
-                self.logger.info(f"No action taken. Price: {current_price:.2f}, MA: {ma:.2f}")
+                self.logger.info("No action taken. Price: %.2f, MA: %.2f", current_price, ma)
                 
         except Exception as e:
-            self.logger.error(f"Trading error: {str(e)}")
+            self.logger.error("Trading error: %s", e)
             raise
 
+# Per-process strategy cache for run_portfolio workers, so the database connection,
+# HTTP session and MA window survive from one call to the next
+_worker_strategies: Dict[tuple, MAStrategy] = {}
+
+def _run_symbol(symbol: str,
+                db_path: str,
+                api_key: str,
+                position: Optional[Position],
+                strategy_kwargs: dict) -> Optional[Position]:
+    """Worker-process entry point for run_portfolio"""
+    # pid in the key: a forked worker must not reuse connections inherited from its parent
+    key = (os.getpid(), symbol, db_path, api_key, tuple(sorted(strategy_kwargs.items())))
+    strategy = _worker_strategies.get(key)
+    if strategy is None:
+        strategy = _worker_strategies[key] = MAStrategy(symbol, db_path, api_key, **strategy_kwargs)
+
+    # The caller owns the positions; the worker may not have seen this symbol's last trade
+    strategy.current_position = position
+    strategy.check_and_trade()
+    return strategy.current_position
+
+def run_portfolio(symbols: List[str],
+                  db_path: str,
+                  api_key: str,
+                  positions: Optional[Dict[str, Optional[Position]]] = None,
+                  executor: Optional[Executor] = None,
+                  max_workers: Optional[int] = None,
+                  **strategy_kwargs) -> Dict[str, Optional[Position]]:
+    """
+    Run one strategy iteration per symbol in parallel worker processes
+    Each worker opens its own database connection and reads only its own rows
+    positions: open positions from the previous call, keyed by symbol
+    executor: long-lived pool to reuse across calls (create it with
+              initializer=init_worker_logging); workers keep their strategies between
+              calls, so a temporary pool, used if this is omitted, starts cold every time
+    max_workers: size of the temporary pool, defaults to os.cpu_count()
+    strategy_kwargs: passed through to MAStrategy (position_size, ma_weeks, ...)
+    Returns: the updated positions map; symbols that failed keep their previous position
+    """
+    results: Dict[str, Optional[Position]] = dict(positions or {})
+    pool = executor or ProcessPoolExecutor(max_workers=max_workers or os.cpu_count(),
+                                           initializer=init_worker_logging)
+    try:
+        futures = {pool.submit(_run_symbol, symbol, db_path, api_key,
+                               results.get(symbol), strategy_kwargs): symbol
+                   for symbol in symbols}
+        for future in as_completed(futures):
+            symbol = futures[future]
+            try:
+                results[symbol] = future.result()
+            except Exception as e:
+                logging.error("Trading error for %s: %s", symbol, e)
+    finally:
+        if executor is None:
+            pool.shutdown()
+
+    return results
+
 def main():
     # Example usage
     try:
@@ -144,7 +242,7 @@ def main():
         strategy.check_and_trade()
         
     except Exception as e:
-        logging.error(f"Error in main: {str(e)}")
+        logging.error("Error in main: %s", e)
 
 if __name__ == "__main__":
     main()
@@ -1,17 +1,30 @@
 import sqlite3
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import logging
-from typing import List, Tuple
+from itertools import islice
+from typing import Iterable, List, Optional, Tuple
+import aiohttp
+import numpy as np
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dataclasses import dataclass
 
+from logging_utils import setup_logging
+
+# Optional: only needed for the DataFrame analytics path
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+
 # Set up logging
-logging.basicConfig(filename='trading.log', level=logging.INFO,
-                   format='%(asctime)s %(levelname)s %(message)s')
+setup_logging('trading.log')
 
 @dataclass
 class PriceData:
-    timestamp: datetime
+    timestamp: datetime  # Timezone-aware UTC
     price: float
 
 class PriceDataManager:
@@ -24,79 +37,304 @@ class PriceDataManager:
         self.db_path = db_path
         self.api_key = api_key
         self.logger = logging.getLogger(__name__)
+        # One long-lived autocommit connection; sqlite3 caches prepared statements on it
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        # Keep-alive session so repeated price requests reuse the TCP/TLS connection
+        self._session = requests.Session()
+        self._session.headers['Authorization'] = f'Bearer {self.api_key}'
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16,
+                              max_retries=Retry(total=3, backoff_factor=0.2))
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
+        # Created lazily inside the running event loop by get_real_time_price_async
+        self._http_session: Optional[aiohttp.ClientSession] = None
         self.setup_database()
 
+    def close(self):
+        """Close the HTTP session and the database connection"""
+        self._session.close()
+        self._conn.close()
+
+    async def aclose(self):
+        """Close the async HTTP session and the database connection"""
+        if self._http_session is not None:
+            await self._http_session.close()
+            self._http_session = None
+        self.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _create_prices_table(self, name: str = 'historical_prices'):
+        self._conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {name} (
+                timestamp INTEGER NOT NULL,  -- Unix epoch seconds
+                symbol TEXT NOT NULL,
+                price REAL,
+                PRIMARY KEY (symbol, timestamp)
+            )
+        ''')
+
+    def _migrate_legacy_schema(self):
+        """
+        Convert a historical_prices table from an older schema in place
+        Older databases stored timestamps as TEXT ('%Y-%m-%d %H:%M:%S', naive local
+        wall time) and keyed rows on timestamp alone
+        """
+        columns = {name: (col_type.upper(), pk) for _, name, col_type, _, _, pk
+                   in self._conn.execute('PRAGMA table_info(historical_prices)')}
+        if not columns:
+            return  # Fresh database
+        if columns.get('timestamp') == ('INTEGER', 2) and columns.get('symbol', ('', 0))[1] == 1:
+            return  # Already current
+
+        # Integer rows are already epoch seconds; TEXT rows are local time, which the
+        # 'utc' modifier converts before SQLite takes the epoch
+        epoch_expr = ("CASE WHEN typeof(timestamp) = 'integer' THEN timestamp "
+                      "ELSE CAST(strftime('%s', timestamp, 'utc') AS INTEGER) END")
+        unparseable = self._conn.execute(
+            f'SELECT COUNT(*) FROM historical_prices WHERE ({epoch_expr}) IS NULL'
+        ).fetchone()[0]
+        if unparseable:
+            raise ValueError(f"Cannot migrate historical_prices: {unparseable} rows have "
+                             f"timestamps that are not epoch seconds or '%Y-%m-%d %H:%M:%S'")
+
+        self.logger.info("Migrating historical_prices to INTEGER epoch timestamps")
+        self._conn.execute('BEGIN')
+        try:
+            self._create_prices_table('historical_prices_new')
+            self._conn.execute(f'''
+                INSERT OR REPLACE INTO historical_prices_new (timestamp, symbol, price)
+                SELECT {epoch_expr}, symbol, price FROM historical_prices
+            ''')
+            # Dropping the old table also drops its indexes
+            self._conn.execute('DROP TABLE historical_prices')
+            self._conn.execute('ALTER TABLE historical_prices_new RENAME TO historical_prices')
+            self._conn.execute('COMMIT')
+        except Exception:
+            self._conn.execute('ROLLBACK')
+            raise
+
     def setup_database(self):
-        """Create database tables if they don't exist"""
+        """Create database tables if they don't exist, migrating older schemas"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS historical_prices (
-                        timestamp DATETIME PRIMARY KEY,
-                        symbol TEXT,
-                        price REAL
+            self._migrate_legacy_schema()
+            self._create_prices_table()
+            # Covering index: symbol/time range scans never touch the table itself
+            self._conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_symbol_ts
+                ON historical_prices(symbol, timestamp DESC, price)
+            ''')
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.execute('PRAGMA mmap_size=268435456')
+        except Exception as e:
+            self.logger.error("Database setup error: %s", e)
+            raise
+
+    def bulk_insert(self, rows: Iterable[Tuple[int, str, float]], batch_size: int = 10_000) -> int:
+        """
+        Insert historical prices, one transaction per batch
+        A row for an existing (symbol, timestamp) updates that row's price
+        rows: (epoch_seconds, symbol, price) tuples
+        batch_size: Rows per transaction
+        Returns: number of rows written
+        """
+        try:
+            rows = iter(rows)
+            total = 0
+            while batch := list(islice(rows, batch_size)):
+                # The connection is in autocommit mode, so open the transaction explicitly
+                self._conn.execute('BEGIN')
+                try:
+                    self._conn.executemany(
+                        '''
+                        INSERT INTO historical_prices (timestamp, symbol, price) VALUES (?, ?, ?)
+                        ON CONFLICT(symbol, timestamp) DO UPDATE SET price = excluded.price
+                        ''',
+                        batch
                     )
-                ''')
-                conn.commit()
+                    self._conn.execute('COMMIT')
+                except Exception:
+                    self._conn.execute('ROLLBACK')
+                    raise
+                total += len(batch)
+            return total
         except Exception as e:
-            self.logger.error(f"Database setup error: {str(e)}")
+            self.logger.error("Error inserting historical prices: %s", e)
             raise
 
     def get_historical_prices(self, symbol: str, weeks: int) -> List[PriceData]:
         """
-        Get historical weekly prices from database
+        Get historical weekly prices from database, newest first
+        Timestamps are timezone-aware UTC datetimes
+        symbol: Trading symbol
+        weeks: Number of weeks of historical data to retrieve
+        """
+        try:
+            start_date = int((datetime.now() - timedelta(weeks=weeks)).timestamp())
+            
+            results = self._conn.execute('''
+                SELECT timestamp, price
+                FROM historical_prices
+                WHERE symbol = ? AND timestamp >= ?
+                ORDER BY timestamp DESC
+            ''', (symbol, start_date)).fetchall()
+            
+            return [
+                PriceData(
+                    timestamp=datetime.fromtimestamp(ts, tz=timezone.utc),
+                    price=price
+                )
+                for ts, price in results
+            ]
+        except Exception as e:
+            self.logger.error("Error fetching historical prices: %s", e)
+            raise
+
+    def get_latest_timestamp(self, symbol: str) -> Optional[int]:
+        """
+        Epoch seconds of the newest stored price for symbol, or None if there is none
+        symbol: Trading symbol
+        """
+        try:
+            return self._conn.execute(
+                'SELECT MAX(timestamp) FROM historical_prices WHERE symbol = ?', (symbol,)
+            ).fetchone()[0]
+        except Exception as e:
+            self.logger.error("Error fetching latest price timestamp: %s", e)
+            raise
+
+    def get_recent_prices_array(self, symbol: str, weeks: int) -> np.ndarray:
+        """
+        Get the most recent historical prices as a float array, oldest first
+        Skips PriceData construction for callers that only need the numbers
         symbol: Trading symbol
         weeks: Number of weeks of historical data to retrieve
         """
+        return self.get_recent_bars_array(symbol, weeks)[1]
+
+    def get_recent_bars_array(self, symbol: str, weeks: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the most recent historical bars as arrays, oldest first
+        symbol: Trading symbol
+        weeks: Number of weeks of historical data to retrieve
+        Returns: (epoch-second timestamps as int64, prices as float64)
+        """
         try:
-            start_date = datetime.now() - timedelta(weeks=weeks)
+            start_date = int((datetime.now() - timedelta(weeks=weeks)).timestamp())
             
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
+            rows = self._conn.execute('''
+                SELECT timestamp, price FROM (
                     SELECT timestamp, price
                     FROM historical_prices
                     WHERE symbol = ? AND timestamp >= ?
                     ORDER BY timestamp DESC
-                ''', (symbol, start_date))
-                
-                results = cursor.fetchall()
-                return [
-                    PriceData(
-                        timestamp=datetime.strptime(ts, '%Y-%m-%d %H:%M:%S'),
-                        price=price
-                    )
-                    for ts, price in results
-                ]
+                    LIMIT ?
+                ) ORDER BY timestamp ASC
+            ''', (symbol, start_date, weeks)).fetchall()
+            timestamps = np.fromiter((ts for ts, _ in rows), dtype=np.int64, count=len(rows))
+            prices = np.fromiter((price for _, price in rows), dtype=np.float64, count=len(rows))
+            return timestamps, prices
         except Exception as e:
-            self.logger.error(f"Error fetching historical prices: {str(e)}")
+            self.logger.error("Error fetching historical price array: %s", e)
             raise
 
+    def get_historical_df(self, symbol: str, weeks: int) -> "pl.DataFrame":
+        """
+        Get historical prices as a polars DataFrame, oldest first, for bulk analytics
+        Columns: timestamp (Datetime, time zone UTC), price (Float64)
+        symbol: Trading symbol
+        weeks: Number of weeks of historical data to retrieve
+        """
+        if pl is None:
+            raise ImportError("polars is required for get_historical_df")
+
+        try:
+            start_date = int((datetime.now() - timedelta(weeks=weeks)).timestamp())
+            
+            df = pl.read_database(
+                '''
+                SELECT timestamp, price
+                FROM historical_prices
+                WHERE symbol = ? AND timestamp >= ?
+                ORDER BY timestamp ASC
+                ''',
+                connection=self._conn,
+                execute_options={"parameters": (symbol, start_date)},
+                schema_overrides={"timestamp": pl.Int64, "price": pl.Float64},
+            )
+            return df.with_columns(
+                pl.from_epoch("timestamp", time_unit="s").dt.replace_time_zone("UTC")
+            )
+        except Exception as e:
+            self.logger.error("Error fetching historical DataFrame: %s", e)
+            raise
+
+    @staticmethod
+    def moving_average(df: "pl.DataFrame", weeks: int) -> float:
+        """Moving average of the last `weeks` prices in a get_historical_df frame"""
+        if df.height < weeks:
+            raise ValueError(f"Insufficient historical data. Need {weeks} weeks, have {df.height}")
+        return df['price'].tail(weeks).mean()
+
+    @staticmethod
+    def _price_url(symbol: str) -> str:
+        # Replace with actual API endpoint
+        return f"https://api.example.com/v1/prices/{symbol}"
+
     def get_real_time_price(self, symbol: str) -> float:
         """
         Get real-time price from API
         symbol: Trading symbol
         """
         try:
-            # Replace with actual API endpoint
-            api_url = f"https://api.example.com/v1/prices/{symbol}"
-            headers = {"Authorization": f"Bearer {self.api_key}"}
-            
-            response = requests.get(api_url, headers=headers)
+            response = self._session.get(self._price_url(symbol), timeout=(2, 5))
             response.raise_for_status()
             
-            data = response.json()
+            data = orjson.loads(response.content)
             current_price = float(data['price'])
             
-            self.logger.info(f"Retrieved real-time price for {symbol}: {current_price}")
+            self.logger.info("Retrieved real-time price for %s: %s", symbol, current_price)
             return current_price
             
         except requests.exceptions.RequestException as e:
-            self.logger.error(f"API request error: {str(e)}")
+            self.logger.error("API request error: %s", e)
             raise
         except (KeyError, ValueError) as e:
-            self.logger.error(f"Error parsing API response: {str(e)}")
+            self.logger.error("Error parsing API response: %s", e)
+            raise
+
+    async def get_real_time_price_async(self, symbol: str) -> float:
+        """
+        Get real-time price from API without blocking the event loop
+        symbol: Trading symbol
+        """
+        try:
+            if self._http_session is None:
+                self._http_session = aiohttp.ClientSession(
+                    headers={"Authorization": f"Bearer {self.api_key}"},
+                    # Same (connect, read) limits as the requests session
+                    timeout=aiohttp.ClientTimeout(sock_connect=2, sock_read=5)
+                )
+            
+            async with self._http_session.get(self._price_url(symbol)) as response:
+                response.raise_for_status()
+                data = orjson.loads(await response.read())
+            
+            current_price = float(data['price'])
+            
+            self.logger.info("Retrieved real-time price for %s: %s", symbol, current_price)
+            return current_price
+            
+        except aiohttp.ClientError as e:
+            self.logger.error("API request error: %s", e)
+            raise
+        except (KeyError, ValueError) as e:
+            self.logger.error("Error parsing API response: %s", e)
             raise
 
     def calculate_weekly_ma(self, symbol: str, weeks: int = 5) -> Tuple[float, float]:
@@ -105,41 +343,47 @@ class PriceDataManager:
         Returns: (moving_average, current_price)
         """
         try:
-            # Get historical weekly prices
-            historical_data = self.get_historical_prices(symbol, weeks)
+            start_date = int((datetime.now() - timedelta(weeks=weeks)).timestamp())
             
-            if len(historical_data) < weeks:
-                raise ValueError(f"Insufficient historical data. Need {weeks} weeks, have {len(historical_data)}")
+            # Average the most recent weekly prices inside SQLite
+            ma, count = self._conn.execute('''
+                SELECT AVG(price), COUNT(*) FROM (
+                    SELECT price
+                    FROM historical_prices
+                    WHERE symbol = ? AND timestamp >= ?
+                    ORDER BY timestamp DESC
+                    LIMIT ?
+                )
+            ''', (symbol, start_date, weeks)).fetchone()
             
-            # Calculate MA from historical prices
-            ma = sum(data.price for data in historical_data[:weeks]) / weeks
+            if count < weeks:
+                raise ValueError(f"Insufficient historical data. Need {weeks} weeks, have {count}")
             
             # Get current price
             current_price = self.get_real_time_price(symbol)
             
-            self.logger.info(f"{symbol} - MA: {ma:.2f}, Current: {current_price:.2f}")
+            self.logger.info("%s - MA: %.2f, Current: %.2f", symbol, ma, current_price)
             return ma, current_price
             
         except Exception as e:
-            self.logger.error(f"Error calculating MA: {str(e)}")
+            self.logger.error("Error calculating MA: %s", e)
             raise
 
 def main():
     # Example usage (for testing)
     try:
-        price_manager = PriceDataManager(
+        with PriceDataManager(
             db_path="prices.db",
             api_key="your_api_key_here"
-        )
-        
-        symbol = "AAPL"  # Example symbol
-        ma, current_price = price_manager.calculate_weekly_ma(symbol)
+        ) as price_manager:
+            symbol = "AAPL"  # Example symbol
+            ma, current_price = price_manager.calculate_weekly_ma(symbol)
         
-        logging.info(f"5-week MA: {ma:.2f}")
-        logging.info(f"Current Price: {current_price:.2f}")
+        logging.info("5-week MA: %.2f", ma)
+        logging.info("Current Price: %.2f", current_price)
         
     except Exception as e:
-        logging.error(f"Error in main: {str(e)}")
+        logging.error("Error in main: %s", e)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,23 @@
+"""
+Builds the optional compiled Black-Scholes kernel (bs_kernel.pyx)
+Usage: python setup.py build_ext --inplace
+black_scholes.py falls back to Numba or NumPy when the extension isn't built
+"""
+import numpy as np
+from setuptools import setup, Extension
+from Cython.Build import cythonize
+
+extensions = [
+    Extension(
+        "bs_kernel",
+        ["bs_kernel.pyx"],
+        include_dirs=[np.get_include()],
+        extra_compile_args=['-O3', '-ffast-math', '-fopenmp', '-march=native'],
+        extra_link_args=['-fopenmp'],
+    )
+]
+
+setup(
+    name="bs_kernel",
+    ext_modules=cythonize(extensions, compiler_directives={'language_level': 3}),
+)
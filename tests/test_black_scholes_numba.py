@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+from scipy.stats import norm
+
+pytest.importorskip("numba")
+
+from black_scholes import BlackScholes
+from black_scholes_numba import norm_cdf, price_chain
+
+
+def _run_kernel(S, K, T, r, sigma, is_call):
+    S, K, T, r, sigma = (np.ascontiguousarray(x, dtype=np.float64) for x in (S, K, T, r, sigma))
+    is_call = np.ascontiguousarray(is_call, dtype=np.bool_).view(np.uint8)
+    out = [np.empty_like(K) for _ in range(5)]
+    price_chain(S, K, T, r, sigma, is_call, *out)
+    price, delta, gamma, vega, theta = out
+    return price, {'delta': delta, 'gamma': gamma, 'vega': vega, 'theta': theta}
+
+
+@pytest.mark.parametrize("x", [-8.0, -3.0, -0.5, -1e-4, 0.0, 1e-4, 0.02, 0.5, 3.0, 8.0])
+def test_norm_cdf_matches_scipy(x):
+    assert norm_cdf(x) == pytest.approx(norm.cdf(x), abs=1e-12)
+
+
+def test_atm_short_expiry_matches_scipy():
+    # ATM, one day to expiry: d1/d2 sit right next to zero, where a broken erf shows up first
+    S, K, T, r, sigma = 100.0, 100.0, 1.0 / 365.0, 0.05, 0.2
+    price, greeks = _run_kernel([S, S], [K, K], [T, T], [r, r], [sigma, sigma], [True, False])
+
+    sqrt_t = np.sqrt(T)
+    d1 = (np.log(S / K) + (r + 0.5 * sigma ** 2) * T) / (sigma * sqrt_t)
+    d2 = d1 - sigma * sqrt_t
+    call = S * norm.cdf(d1) - K * np.exp(-r * T) * norm.cdf(d2)
+    put = K * np.exp(-r * T) * norm.cdf(-d2) - S * norm.cdf(-d1)
+
+    np.testing.assert_allclose(price, [call, put], rtol=1e-10)
+    np.testing.assert_allclose(greeks['delta'], [norm.cdf(d1), norm.cdf(d1) - 1], rtol=1e-10)
+
+
+def test_price_chain_matches_price_batch():
+    rng = np.random.default_rng(0)
+    n = 257
+    S = rng.uniform(50, 150, n)
+    K = rng.uniform(50, 150, n)
+    T = rng.uniform(1 / 365, 2.0, n)
+    r = rng.uniform(0.0, 0.08, n)
+    sigma = rng.uniform(0.05, 0.8, n)
+    is_call = rng.random(n) < 0.5
+
+    price, greeks = _run_kernel(S, K, T, r, sigma, is_call)
+
+    bs = BlackScholes()
+    np.testing.assert_allclose(price, bs.price_batch(S, K, T, r, sigma, is_call), rtol=1e-9, atol=1e-10)
+    expected = bs.greeks_batch(S, K, T, r, sigma, is_call)
+    for name in ('delta', 'gamma', 'vega', 'theta'):
+        np.testing.assert_allclose(greeks[name], expected[name], rtol=1e-9, atol=1e-10)
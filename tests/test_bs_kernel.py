@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+# Only present after: python setup.py build_ext --inplace
+bs_kernel = pytest.importorskip("bs_kernel")
+
+from black_scholes import BlackScholes
+
+
+def _run_kernel(S, K, T, r, sigma, is_call):
+    S, K, T, r, sigma = (np.ascontiguousarray(x, dtype=np.float64) for x in (S, K, T, r, sigma))
+    is_call = np.ascontiguousarray(is_call, dtype=np.bool_).view(np.uint8)
+    out = [np.empty_like(K) for _ in range(5)]
+    bs_kernel.price_chain(S, K, T, r, sigma, is_call, *out)
+    price, delta, gamma, vega, theta = out
+    return price, {'delta': delta, 'gamma': gamma, 'vega': vega, 'theta': theta}
+
+
+def test_price_chain_matches_price_batch():
+    rng = np.random.default_rng(0)
+    n = 257
+    S = rng.uniform(50, 150, n)
+    K = rng.uniform(50, 150, n)
+    T = rng.uniform(1 / 365, 2.0, n)
+    r = rng.uniform(0.0, 0.08, n)
+    sigma = rng.uniform(0.05, 0.8, n)
+    is_call = rng.random(n) < 0.5
+
+    price, greeks = _run_kernel(S, K, T, r, sigma, is_call)
+
+    bs = BlackScholes()
+    np.testing.assert_allclose(price, bs.price_batch(S, K, T, r, sigma, is_call), rtol=1e-9, atol=1e-10)
+    expected = bs.greeks_batch(S, K, T, r, sigma, is_call)
+    for name in ('delta', 'gamma', 'vega', 'theta'):
+        np.testing.assert_allclose(greeks[name], expected[name], rtol=1e-9, atol=1e-10)
@@ -0,0 +1,70 @@
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("alpaca")
+
+import ma_strategy
+import price_data
+from ma_strategy import MAStrategy, _WEEK_SECONDS
+
+DAY = 24 * 60 * 60
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Fake wall clock shared by ma_strategy and price_data, in epoch seconds"""
+    state = {'now': float(int(time.time()))}
+
+    class _FakeDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime.fromtimestamp(state['now'], tz)
+
+    monkeypatch.setattr(ma_strategy, 'time', SimpleNamespace(time=lambda: state['now']))
+    monkeypatch.setattr(price_data, 'datetime', _FakeDatetime)
+    return state
+
+
+@pytest.fixture
+def strategy(tmp_path, clock):
+    strategy = MAStrategy('BTC/USD', str(tmp_path / 'prices.db'), 'key')
+    yield strategy
+    strategy.price_manager.close()
+
+
+def _write_weekly_bars(strategy, newest_ts, prices):
+    """Insert one bar per week, oldest first, ending at newest_ts"""
+    n = len(prices)
+    strategy.price_manager.bulk_insert(
+        (newest_ts - (n - 1 - i) * _WEEK_SECONDS, strategy.symbol, price)
+        for i, price in enumerate(prices)
+    )
+
+
+def test_current_ma_picks_up_new_bar_once_due(strategy, clock):
+    start = int(clock['now'])
+    _write_weekly_bars(strategy, start - DAY, [100.0] * 5)
+    assert strategy.current_ma() == pytest.approx(100.0)
+
+    # Next bar lands, but the refresh isn't due until a week after the cached newest bar
+    strategy.price_manager.bulk_insert([(start, strategy.symbol, 200.0)])
+    clock['now'] = start + 5 * DAY
+    assert strategy.current_ma() == pytest.approx(100.0)
+
+    clock['now'] = start + 6 * DAY
+    assert strategy.current_ma() == pytest.approx(120.0)
+
+
+def test_current_ma_raises_once_bars_age_out(strategy, clock):
+    _write_weekly_bars(strategy, int(clock['now']) - DAY, [100.0] * 5)
+    assert strategy.current_ma() == pytest.approx(100.0)
+
+    # No new bars for 30 days: the oldest cached bars fall outside the 5-week lookback
+    clock['now'] += 30 * DAY
+    with pytest.raises(ValueError, match="Insufficient historical data"):
+        strategy.current_ma()
+    with pytest.raises(ValueError, match="Insufficient historical data"):
+        strategy.current_ma()
@@ -0,0 +1,82 @@
+import sqlite3
+import time
+from datetime import datetime
+
+import pytest
+
+from price_data import PriceDataManager
+
+
+@pytest.fixture
+def local_tz(monkeypatch):
+    """Run under a non-UTC local time zone so local/UTC mix-ups show up"""
+    if not hasattr(time, 'tzset'):
+        pytest.skip("time.tzset is not available on this platform")
+    monkeypatch.setenv('TZ', 'America/New_York')
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def _create_legacy_db(path, rows):
+    """historical_prices as the original schema wrote it: naive local TEXT timestamps"""
+    with sqlite3.connect(path) as conn:
+        conn.execute('''
+            CREATE TABLE historical_prices (
+                timestamp DATETIME PRIMARY KEY,
+                symbol TEXT,
+                price REAL
+            )
+        ''')
+        conn.executemany('INSERT INTO historical_prices VALUES (?, ?, ?)', rows)
+    conn.close()
+
+
+def test_legacy_text_timestamps_migrate_to_local_epochs(tmp_path, local_tz):
+    db_path = str(tmp_path / 'prices.db')
+    _create_legacy_db(db_path, [
+        ('2024-01-02 03:04:05', 'BTC/USD', 100.0),
+        ('2024-07-01 12:00:00.123456', 'ETH/USD', 200.0),
+    ])
+
+    with PriceDataManager(db_path, 'key') as manager:
+        columns = {name: (col_type, pk) for _, name, col_type, _, _, pk
+                   in manager._conn.execute('PRAGMA table_info(historical_prices)')}
+        rows = manager._conn.execute(
+            'SELECT symbol, timestamp, price FROM historical_prices ORDER BY symbol'
+        ).fetchall()
+
+    assert columns['symbol'] == ('TEXT', 1)
+    assert columns['timestamp'] == ('INTEGER', 2)
+    assert rows == [
+        ('BTC/USD', int(datetime(2024, 1, 2, 3, 4, 5).timestamp()), 100.0),
+        ('ETH/USD', int(datetime(2024, 7, 1, 12, 0, 0).timestamp()), 200.0),
+    ]
+
+
+def test_legacy_unparseable_timestamps_raise(tmp_path):
+    db_path = str(tmp_path / 'prices.db')
+    _create_legacy_db(db_path, [('yesterday', 'BTC/USD', 100.0)])
+
+    with pytest.raises(ValueError, match="Cannot migrate historical_prices"):
+        PriceDataManager(db_path, 'key')
+
+
+def test_bulk_insert_keeps_symbols_sharing_timestamps(tmp_path):
+    db_path = str(tmp_path / 'prices.db')
+    timestamps = [1_700_000_000 + i * 60 for i in range(3)]
+
+    with PriceDataManager(db_path, 'key') as manager:
+        manager.bulk_insert((ts, 'BTC/USD', 100.0 + i) for i, ts in enumerate(timestamps))
+        manager.bulk_insert((ts, 'ETH/USD', 10.0 + i) for i, ts in enumerate(timestamps))
+        # Re-inserting an existing (symbol, timestamp) updates its price in place
+        manager.bulk_insert([(timestamps[0], 'BTC/USD', 99.0)])
+        rows = manager._conn.execute(
+            'SELECT symbol, timestamp, price FROM historical_prices ORDER BY symbol, timestamp'
+        ).fetchall()
+
+    assert rows == (
+        [('BTC/USD', timestamps[0], 99.0), ('BTC/USD', timestamps[1], 101.0), ('BTC/USD', timestamps[2], 102.0)]
+        + [('ETH/USD', ts, 10.0 + i) for i, ts in enumerate(timestamps)]
+    )